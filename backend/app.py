@@ -1,12 +1,19 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import pickle
+import json
+import atexit
 import pandas as pd
 import os
 import sys
 from sklearn.base import BaseEstimator, RegressorMixin
 import numpy as np
 
+# Sibling modules must import both as `python app.py` and as `backend.app` under gunicorn
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import shared_store
+import drift_monitor
+
 app = Flask(__name__, static_folder='../frontend/dist', static_url_path='')
 CORS(app, resources={r"/*": {"origins": "*"}})
 
@@ -31,6 +38,77 @@ def load_model():
 
 load_model()
 
+# Shared-memory mode (SHARED_MEMORY=1, see gunicorn.conf.py):
+# The master publishes the model arrays and the engineered history table once,
+# then every worker maps the same read-only pages instead of its own copy.
+SHARED_MEMORY = os.environ.get('SHARED_MEMORY', '0') == '1'
+CSV_PATH = os.path.join(os.path.dirname(__file__), '../primary.csv')
+history_table = None
+
+def load_shared_store():
+    global model, history_table
+    store_dir = shared_store.default_store_dir()
+    try:
+        shared_store.publish(store_dir, model, CSV_PATH)
+        shared_model = shared_store.attach_model(store_dir)
+        if shared_model is not None:
+            # Drop the unpickled estimator; predictions now read the mapped arrays
+            model = shared_model
+        history_table = shared_store.attach_table(store_dir)
+        print(f"Shared store attached at {store_dir}")
+
+        # Clean up when run without gunicorn's on_exit (e.g. `python app.py`);
+        # only the publishing process may remove it, never a forked worker.
+        publisher_pid = os.getpid()
+        atexit.register(lambda: os.getpid() == publisher_pid and shared_store.remove_store(store_dir))
+    except Exception as e:
+        print(f"Shared store unavailable, using in-process model: {e}")
+
+if SHARED_MEMORY:
+    load_shared_store()
+
+# Columns /predict drops on purpose (target, identifiers and UI-only fields)
+PREDICT_DROP_COLUMNS = [
+    '30-day Readmission Rate (Consolidated)', 
+    'County', 
+    'Year',
+    # Also drop extra UI fields that might confuse the model if it doesn't filter them
+    'cluster_id', 'cluster_name' 
+]
+
+# Streaming drift / data-quality monitor over /predict payloads
+# Statistics are shared by all workers when SHARED_MEMORY=1 (kept in the shared store)
+# or when DRIFT_STATE_DIR points every worker at the same directory.
+REFERENCE_PATH = os.path.join(os.path.dirname(__file__), '../my_reference_stats.json')
+DRIFT_STATE_DIR = shared_store.default_store_dir() if SHARED_MEMORY else os.environ.get('DRIFT_STATE_DIR')
+DRIFT_HALF_LIFE = float(os.environ.get('DRIFT_HALF_LIFE', drift_monitor.DEFAULT_HALF_LIFE))
+drift = None
+
+def load_drift_monitor():
+    global drift
+    try:
+        if os.path.exists(REFERENCE_PATH):
+            with open(REFERENCE_PATH) as f:
+                reference = json.load(f)
+        elif os.path.exists(CSV_PATH):
+            # No saved reference (older model artifact): rebuild it from the training data
+            df_ref = shared_store.engineer_features(pd.read_csv(CSV_PATH))
+            reference = drift_monitor.build_reference(df_ref, shared_store.FEATURE_COLS)
+        else:
+            print("Drift monitor disabled: no reference statistics found")
+            return
+        drift = drift_monitor.DriftMonitor(
+            reference,
+            ignored_columns=PREDICT_DROP_COLUMNS,
+            state_dir=DRIFT_STATE_DIR,
+            half_life=DRIFT_HALF_LIFE
+        )
+        print("Drift monitor ready.")
+    except Exception as e:
+        print(f"Error loading drift monitor: {e}")
+
+load_drift_monitor()
+
 # Serve Vue App
 @app.route('/')
 def index():
@@ -71,6 +149,13 @@ def predict():
     try:
         data = request.json
         
+        # Update streaming drift statistics (O(1); never blocks a prediction)
+        if drift is not None and isinstance(data, dict):
+            try:
+                drift.observe(data)
+            except Exception as e:
+                print(f"Drift monitor error: {e}")
+        
         # New "Weather App" fields from user request:
         # 30-day Readmits (Proportion), ICD Version, PCPI_log, Total Admits people(log), last_year_rate
         # We prioritize these if present.
@@ -85,13 +170,7 @@ def predict():
         df = pd.DataFrame([data])
         
         # Columns known to be dropped in User's workflow
-        cols_to_drop = [
-            '30-day Readmission Rate (Consolidated)', 
-            'County', 
-            'Year',
-            # Also drop extra UI fields that might confuse the model if it doesn't filter them
-            'cluster_id', 'cluster_name' 
-        ]
+        cols_to_drop = PREDICT_DROP_COLUMNS
         
         # Drop validation
         df_final = df.drop(columns=cols_to_drop, errors='ignore')
@@ -153,10 +232,30 @@ def predict():
         print(f"Prediction wrapper error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/drift', methods=['GET'])
+def get_drift():
+    if drift is None:
+        return jsonify({"error": "Drift monitor not available"}), 500
+    return jsonify(drift.report())
+
 @app.route('/history', methods=['GET'])
 def get_history():
     try:
-        csv_path = os.path.join(os.path.dirname(__file__), '../primary.csv')
+        # Shared-memory mode: rows and predictions were computed once by the master
+        if history_table is not None:
+            t = history_table
+            output_data = [
+                {
+                    'Year': int(t['year'][i]),
+                    'County': str(t['county'][i]),
+                    '30-day Readmission Rate (Consolidated)': float(t['actual'][i]),
+                    'Predicted_Rate': float(t['predictions'][i])
+                }
+                for i in range(len(t['year']))
+            ]
+            return jsonify(output_data)
+
+        csv_path = CSV_PATH
         if not os.path.exists(csv_path):
             csv_path = '/kaggle/input/hospital-readmission-rates-in-california/primary.csv' # Fallback
             
@@ -166,24 +265,12 @@ def get_history():
         df = pd.read_csv(csv_path)
         
         # Preprocessing for Model Prediction
-        # 1. Sort
-        df = df.sort_values(by=['County', 'Year'])
-        
-        # 2. Calculate Last Year Rate
-        df['last_year_rate'] = df.groupby('County')['30-day Readmission Rate (Consolidated)'].shift(1)
-        
-        # 3. Drop rows with NaN (First year 2011 usually)
-        df_pred = df.dropna(subset=['last_year_rate']).copy()
-        
-        # 4. Feature Engineering
-        df_pred['ICD Version(Ordinal)'] = df_pred['ICD Version'].apply(lambda x: 1 if '10' in str(x) else 0)
-        df_pred['PCPI_log'] = np.log(df_pred['PCPI'])
-        df_pred['Total Admits people(log)'] = np.log(df_pred['Total Admits (Consolidated)'])
-        # '30-day Readmits (Proportion)' is already there
+        # Sort, lag last year's rate, drop the first year and derive log / ordinal columns
+        df_pred = shared_store.engineer_features(df)
         
         # 5. Select Features matching Model
         # Features: ['30-day Readmits (Proportion)', 'ICD Version(Ordinal)', 'PCPI_log', 'Total Admits people(log)', 'last_year_rate']
-        feature_cols = ['30-day Readmits (Proportion)', 'ICD Version(Ordinal)', 'PCPI_log', 'Total Admits people(log)', 'last_year_rate']
+        feature_cols = shared_store.FEATURE_COLS
         
         # Prepare Input X
         X = df_pred[feature_cols]
@@ -0,0 +1,342 @@
+"""Streaming drift and data-quality monitor for /predict requests.
+
+Every statistic is updated in O(1) per request with constant memory: weighted
+Welford mean/variance, missing/invalid/out-of-range counts, a fixed-bin
+histogram used as a quantile sketch and a histogram over the reference deciles
+(for PSI). Live statistics are compared with reference statistics captured from
+primary.csv at training time.
+
+Counts decay exponentially (``half_life`` seconds), so a new shift shows up after
+weeks of uptime and an old spike fades out. Decay is lazy: each update is weighted
+by ``2 ** (age / half_life)`` relative to an anchor time and reads scale back down,
+so no slot is touched except the ones being updated.
+
+All state lives in one flat float64 array. With ``state_dir`` set (the user-026
+shared store under gunicorn) it is a memory-mapped ``.npy`` file guarded by
+``flock``, so every worker updates and reports the same statistics.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: fall back to in-process state
+    fcntl = None
+
+QUANTILES = [0.05, 0.5, 0.95]
+SKETCH_BINS = 100           # equal-width bins over [ref_min - width, ref_max + width]
+DEFAULT_HALF_LIFE = 3600.0  # seconds
+
+# Alert thresholds; every alert needs MIN_SAMPLES (decayed) observations first
+MIN_SAMPLES = 30
+PSI_ALERT = 0.25            # > 0.25 is the usual "significant shift" cut-off
+MEAN_SHIFT_ALERT = 3.0      # live mean vs reference mean, in reference std units
+MISSING_RATE_ALERT = 0.1    # missing or non-numeric share above the reference
+OUT_OF_RANGE_ALERT = 0.1    # share of values outside the reference [min, max]
+MAX_UNKNOWN_COLUMNS = 50    # distinct unknown column names tracked
+COLUMN_DTYPE = '<U64'
+
+# File names in state_dir (shared_store.remove_store deletes these too)
+STATE_FILE = 'drift_state.npy'
+COLUMNS_FILE = 'drift_columns.npy'
+LOCK_FILE = 'drift.lock'
+
+# Global slots, followed by one unknown-column weight per name slot
+ANCHOR, REQUESTS, TOTAL_REQUESTS = range(3)
+UNKNOWN_OFFSET = 3
+# Rescale all weights once the lazy decay factor reaches 2 ** this
+RENORMALIZE_EXPONENT = 200
+
+
+def build_reference(df, feature_cols):
+    """Reference statistics for ``feature_cols`` of an engineered training frame."""
+    features = {}
+    for col in feature_cols:
+        values = df[col].to_numpy(dtype=np.float64)
+        present = values[~np.isnan(values)]
+        # Decile edges; duplicates collapse for discrete features like ICD Version(Ordinal)
+        edges = np.unique(np.quantile(present, np.linspace(0.1, 0.9, 9)))
+        counts = np.bincount(np.searchsorted(edges, present, side='right'), minlength=len(edges) + 1)
+        features[col] = {
+            'mean': float(present.mean()),
+            'std': float(present.std()),
+            'min': float(present.min()),
+            'max': float(present.max()),
+            'missing_rate': float(1 - len(present) / len(values)),
+            'quantiles': {str(q): float(np.quantile(present, q)) for q in QUANTILES},
+            'bin_edges': [float(e) for e in edges],
+            'bin_fractions': [float(c) for c in counts / len(present)]
+        }
+    return {'n_rows': int(len(df)), 'features': features}
+
+
+class FeatureStats:
+    """Decayed running statistics for one feature, kept in a slice of the state array."""
+
+    WEIGHT, MEAN, M2, MISSING, INVALID, OUT_OF_RANGE = range(6)
+    N_SCALARS = 6
+
+    def __init__(self, reference, state):
+        self.reference = reference
+        self.state = state
+        n_psi = len(reference['bin_edges']) + 1
+        self.psi_bins = state[self.N_SCALARS:self.N_SCALARS + n_psi]
+        # Sketch bin 0 is underflow, SKETCH_BINS + 1 is overflow
+        self.sketch_bins = state[self.N_SCALARS + n_psi:]
+        width = (reference['max'] - reference['min']) or 1.0
+        self.sketch_edges = np.linspace(reference['min'] - width, reference['max'] + width, SKETCH_BINS + 1)
+
+    @classmethod
+    def size(cls, reference):
+        return cls.N_SCALARS + len(reference['bin_edges']) + 1 + SKETCH_BINS + 2
+
+    @classmethod
+    def decayed_slots(cls, reference):
+        # Everything but the mean is a weighted sum and decays
+        mask = np.ones(cls.size(reference), dtype=bool)
+        mask[cls.MEAN] = False
+        return mask
+
+    def update(self, raw, w):
+        s = self.state
+        if raw is None or raw == '':
+            s[self.MISSING] += w
+            return
+        try:
+            x = float(raw)
+        except (TypeError, ValueError):
+            s[self.INVALID] += w
+            return
+        if math.isnan(x) or math.isinf(x):
+            s[self.INVALID] += w
+            return
+
+        # Weighted Welford update
+        total = s[self.WEIGHT] + w
+        delta = x - s[self.MEAN]
+        s[self.MEAN] += delta * w / total
+        s[self.M2] += w * delta * (x - s[self.MEAN])
+        s[self.WEIGHT] = total
+
+        ref = self.reference
+        if x < ref['min'] or x > ref['max']:
+            s[self.OUT_OF_RANGE] += w
+        self.psi_bins[np.searchsorted(ref['bin_edges'], x, side='right')] += w
+        lo, hi = self.sketch_edges[0], self.sketch_edges[-1]
+        if x < lo:
+            self.sketch_bins[0] += w
+        elif x >= hi:
+            self.sketch_bins[-1] += w
+        else:
+            self.sketch_bins[1 + int((x - lo) / (hi - lo) * SKETCH_BINS)] += w
+
+    def quantile(self, q):
+        # Linear interpolation inside the histogram bin; clamped to the sketch range
+        cumulative = np.cumsum(self.sketch_bins)
+        if cumulative[-1] <= 0:
+            return None
+        target = q * cumulative[-1]
+        i = int(np.searchsorted(cumulative, target))
+        if i == 0:
+            return float(self.sketch_edges[0])
+        if i >= SKETCH_BINS + 1:
+            return float(self.sketch_edges[-1])
+        frac = (target - cumulative[i - 1]) / self.sketch_bins[i] if self.sketch_bins[i] > 0 else 0.0
+        return float(self.sketch_edges[i - 1] + frac * (self.sketch_edges[i] - self.sketch_edges[i - 1]))
+
+    def psi(self):
+        # Population stability index over the reference decile bins
+        if self.state[self.WEIGHT] <= 0:
+            return None
+        eps = 1e-4
+        total = 0.0
+        for live, expected in zip(self.psi_bins / self.state[self.WEIGHT], self.reference['bin_fractions']):
+            actual = max(float(live), eps)
+            expected = max(expected, eps)
+            total += (actual - expected) * math.log(actual / expected)
+        return total
+
+    def report(self, name, scale):
+        s = self.state
+        ref = self.reference
+        count = s[self.WEIGHT] * scale
+        seen = (s[self.WEIGHT] + s[self.MISSING] + s[self.INVALID]) * scale
+        has_values = s[self.WEIGHT] > 0
+        mean = float(s[self.MEAN]) if has_values else None
+        std = math.sqrt(max(s[self.M2] / s[self.WEIGHT], 0.0)) if has_values else None
+        missing_rate = (s[self.MISSING] + s[self.INVALID]) * scale / seen if seen > 0 else 0.0
+        out_of_range_rate = s[self.OUT_OF_RANGE] / s[self.WEIGHT] if has_values else 0.0
+        mean_shift = (mean - ref['mean']) / ref['std'] if has_values and ref['std'] > 0 else None
+        psi = self.psi()
+
+        alerts = []
+        if count >= MIN_SAMPLES:
+            if abs(mean_shift or 0.0) > MEAN_SHIFT_ALERT:
+                alerts.append(f"{name}: mean {mean:.4g} is {mean_shift:+.1f} std from reference {ref['mean']:.4g}")
+            if out_of_range_rate > OUT_OF_RANGE_ALERT:
+                alerts.append(f"{name}: {out_of_range_rate:.1%} of values outside reference range [{ref['min']:.4g}, {ref['max']:.4g}]")
+            if psi is not None and psi > PSI_ALERT:
+                alerts.append(f"{name}: PSI {psi:.3f} above {PSI_ALERT}")
+        if seen >= MIN_SAMPLES and missing_rate > ref['missing_rate'] + MISSING_RATE_ALERT:
+            alerts.append(f"{name}: missing/invalid rate {missing_rate:.1%}")
+
+        return {
+            'effective_count': float(count),
+            'mean': mean,
+            'std': std,
+            'quantiles': {str(q): self.quantile(q) for q in QUANTILES},
+            'missing_rate': float(missing_rate),
+            'invalid_count': float(s[self.INVALID] * scale),
+            'out_of_range_rate': float(out_of_range_rate),
+            'mean_shift': mean_shift,
+            'psi': psi,
+            'reference': {
+                'mean': ref['mean'],
+                'std': ref['std'],
+                'min': ref['min'],
+                'max': ref['max'],
+                'quantiles': ref['quantiles'],
+                'missing_rate': ref['missing_rate']
+            },
+            'alerts': alerts
+        }
+
+
+class DriftMonitor:
+    """Per-feature decayed statistics over incoming prediction payloads."""
+
+    def __init__(self, reference, ignored_columns=(), state_dir=None, half_life=DEFAULT_HALF_LIFE):
+        self.ignored_columns = set(ignored_columns)
+        self.half_life = float(half_life)
+        self.state_dir = state_dir if fcntl is not None else None
+        self._thread_lock = threading.Lock()
+        self._lock_file = None
+        self._lock_pid = None
+
+        # Lay out the global slots, then one slice per feature
+        offset = UNKNOWN_OFFSET + MAX_UNKNOWN_COLUMNS
+        layout = []
+        decayed = [np.array([False, True, False] + [True] * MAX_UNKNOWN_COLUMNS)]
+        for name, ref in reference['features'].items():
+            layout.append((name, ref, offset))
+            offset += FeatureStats.size(ref)
+            decayed.append(FeatureStats.decayed_slots(ref))
+        self.decayed = np.concatenate(decayed)
+
+        self.state, self.columns = self._open_state(offset)
+        self.features = {
+            name: FeatureStats(ref, self.state[start:start + FeatureStats.size(ref)])
+            for name, ref, start in layout
+        }
+
+    def _open_state(self, size):
+        if self.state_dir is None:
+            state = np.zeros(size)
+            state[ANCHOR] = time.time()
+            return state, np.full(MAX_UNKNOWN_COLUMNS, '', dtype=COLUMN_DTYPE)
+
+        os.makedirs(self.state_dir, exist_ok=True)
+        with self._locked():
+            state = self._open_array(STATE_FILE, (size,), np.float64)
+            columns = self._open_array(COLUMNS_FILE, (MAX_UNKNOWN_COLUMNS,), COLUMN_DTYPE)
+            if state[ANCHOR] == 0:
+                # Fresh state: column names must not outlive their weights
+                columns[:] = ''
+                state[ANCHOR] = time.time()
+        return state, columns
+
+    def _open_array(self, file_name, shape, dtype):
+        path = os.path.join(self.state_dir, file_name)
+        if os.path.exists(path):
+            try:
+                array = np.lib.format.open_memmap(path, mode='r+')
+                if array.shape == shape and array.dtype == np.dtype(dtype):
+                    return array
+            except Exception:
+                pass
+        # New store, or one written for a different reference layout: start empty
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            if self.state_dir is None:
+                yield
+                return
+            if self._lock_pid != os.getpid():
+                # flock belongs to the open file, so each forked worker needs its own
+                self._lock_file = open(os.path.join(self.state_dir, LOCK_FILE), 'a')
+                self._lock_pid = os.getpid()
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _weight(self, now):
+        exponent = (now - self.state[ANCHOR]) / self.half_life
+        if exponent > RENORMALIZE_EXPONENT:
+            # Rare: fold the accumulated growth back in before floats overflow
+            self.state[self.decayed] *= 2.0 ** -exponent
+            self.state[ANCHOR] = now
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def _scale(self, now):
+        return 2.0 ** -((now - self.state[ANCHOR]) / self.half_life)
+
+    def observe(self, payload):
+        with self._locked():
+            w = self._weight(time.time())
+            self.state[REQUESTS] += w
+            self.state[TOTAL_REQUESTS] += 1
+            for name, stats in self.features.items():
+                stats.update(payload.get(name), w)
+            # Columns /predict would silently drop; bounded so junk keys cannot grow memory
+            for col in payload:
+                if col in self.features or col in self.ignored_columns:
+                    continue
+                self._count_unknown(str(col)[:64], w)
+
+    def _count_unknown(self, col, w):
+        weights = self.state[UNKNOWN_OFFSET:UNKNOWN_OFFSET + MAX_UNKNOWN_COLUMNS]
+        match = np.flatnonzero(self.columns == col)
+        if len(match):
+            weights[match[0]] += w
+            return
+        # Take a free slot, or one whose name has decayed below a single current request
+        slot = int(np.argmin(weights))
+        if self.columns[slot] == '' or weights[slot] < w:
+            self.columns[slot] = col
+            weights[slot] = w
+
+    def report(self):
+        with self._locked():
+            scale = self._scale(time.time())
+            features = {name: stats.report(name, scale) for name, stats in self.features.items()}
+            effective_requests = float(self.state[REQUESTS] * scale)
+            weights = self.state[UNKNOWN_OFFSET:UNKNOWN_OFFSET + MAX_UNKNOWN_COLUMNS] * scale
+            unknown_columns = {
+                str(col): round(float(weight), 2)
+                for col, weight in zip(self.columns, weights)
+                if col and weight >= 0.5
+            }
+            alerts = [a for f in features.values() for a in f['alerts']]
+            frequent = sorted(col for col, weight in unknown_columns.items() if weight >= MIN_SAMPLES)
+            if frequent:
+                alerts.append(f"Unknown columns dropped by /predict: {', '.join(frequent)}")
+            return {
+                'n_requests': int(self.state[TOTAL_REQUESTS]),
+                'effective_requests': effective_requests,
+                'half_life_seconds': self.half_life,
+                'shared_across_workers': self.state_dir is not None,
+                'features': features,
+                'unknown_columns': unknown_columns,
+                'alerts': alerts,
+                'drift_detected': bool(alerts)
+            }
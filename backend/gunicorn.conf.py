@@ -0,0 +1,21 @@
+# Gunicorn settings for the Docker image (CMD uses `-c backend/gunicorn.conf.py`)
+import os
+import sys
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+
+# SHARED_MEMORY=1: load backend.app once in the master so the model arrays and
+# history table are published before forking; workers only map them read-only.
+# PRELOAD_APP=1 preloads without the shared store (imports shared copy-on-write only).
+shared_memory = os.environ.get('SHARED_MEMORY', '0') == '1'
+preload_app = shared_memory or os.environ.get('PRELOAD_APP', '0') == '1'
+
+
+def on_exit(server):
+    # Remove the published .npy files; the master published them, so its PID names the store
+    if not shared_memory:
+        return
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import shared_store
+    shared_store.remove_store(shared_store.default_store_dir())
@@ -0,0 +1,219 @@
+"""Shared, read-only model and feature arrays for multi-worker deployments.
+
+The gunicorn master builds everything once and writes plain ``.npy`` files into
+a RAM-backed directory (``/dev/shm`` when available). Workers open them with
+``np.load(mmap_mode='r')`` so every process maps the same physical pages
+instead of holding its own unpickled copy.
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+
+# Features used by the production model (same order as retrain_model.py)
+FEATURE_COLS = [
+    '30-day Readmits (Proportion)',
+    'ICD Version(Ordinal)',
+    'PCPI_log',
+    'Total Admits people(log)',
+    'last_year_rate'
+]
+TARGET_COL = '30-day Readmission Rate (Consolidated)'
+
+MODEL_ARRAYS = ['left', 'right', 'feature', 'threshold', 'value', 'params']
+TABLE_ARRAYS = ['year', 'county', 'actual', 'features', 'predictions']
+
+
+def engineer_features(df, group_col='County'):
+    """Apply the training-time feature engineering to a raw primary.csv frame.
+
+    ``last_year_rate`` is lagged within ``group_col`` (e.g. a hospital id for
+    hospital-level files). Rows without a previous year are dropped.
+    """
+    # 1. Sort so the lag is taken within each group
+    df = df.sort_values(by=[group_col, 'Year'])
+
+    # 2. Calculate Last Year Rate
+    df['last_year_rate'] = df.groupby(group_col)[TARGET_COL].shift(1)
+
+    # 3. Drop rows with NaN (First year 2011 usually)
+    df = df.dropna(subset=['last_year_rate']).copy()
+
+    # 4. Derived columns
+    df['ICD Version(Ordinal)'] = df['ICD Version'].apply(lambda x: 1 if '10' in str(x) else 0)
+    df['PCPI_log'] = np.log(df['PCPI'])
+    df['Total Admits people(log)'] = np.log(df['Total Admits (Consolidated)'])
+    # '30-day Readmits (Proportion)' is already there
+    return df
+
+
+def default_store_dir():
+    """Directory for the shared arrays, overridable with SHARED_STORE_DIR.
+
+    The default is keyed by the publishing (master) PID so several instances on
+    one host never share or overwrite each other's arrays.
+    """
+    if os.environ.get('SHARED_STORE_DIR'):
+        return os.environ['SHARED_STORE_DIR']
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, f'readmission_store_{os.getpid()}')
+
+
+def _save(store_dir, name, array):
+    # Write then rename so a worker never maps a half-written file
+    path = os.path.join(store_dir, name + '.npy')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _clear(store_dir, names):
+    # Drop arrays left over from an earlier publish so workers never attach stale data
+    for name in names:
+        path = os.path.join(store_dir, name + '.npy')
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _load(store_dir, names):
+    return {name: np.load(os.path.join(store_dir, name + '.npy'), mmap_mode='r') for name in names}
+
+
+class SharedTreeEnsemble:
+    """Read-only GradientBoostingRegressor backed by memory-mapped node arrays.
+
+    Exposes ``predict`` and ``feature_names_in_`` so the Flask handlers can use
+    it exactly like the pickled estimator.
+    """
+
+    def __init__(self, arrays, feature_names):
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.value = arrays['value']
+        self.init_value, self.learning_rate, self.max_depth = arrays['params']
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = len(feature_names)
+
+    def predict(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)].to_numpy()
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_trees = self.left.shape[0]
+        rows = np.arange(X.shape[0])[:, None]
+        trees = np.arange(n_trees)[None, :]
+        node = np.zeros((X.shape[0], n_trees), dtype=np.int64)
+        for _ in range(int(self.max_depth)):
+            is_leaf = self.left[trees, node] == -1
+            go_left = X[rows, self.feature[trees, node]] <= self.threshold[trees, node]
+            child = np.where(go_left, self.left[trees, node], self.right[trees, node])
+            node = np.where(is_leaf, node, child)
+        return self.init_value + self.learning_rate * self.value[trees, node].sum(axis=1)
+
+
+def export_model_arrays(model):
+    """Flatten a fitted GradientBoostingRegressor into padded node arrays.
+
+    Returns None for any other estimator type; callers keep the pickled model.
+    """
+    if not isinstance(model, GradientBoostingRegressor) or not hasattr(model, 'estimators_'):
+        return None
+    init = getattr(model, 'init_', None)
+    if not hasattr(init, 'constant_'):
+        return None
+
+    trees = [est.tree_ for est in model.estimators_[:, 0]]
+    n_nodes = max(t.node_count for t in trees)
+    shape = (len(trees), n_nodes)
+    arrays = {
+        'left': np.full(shape, -1, dtype=np.int64),
+        'right': np.full(shape, -1, dtype=np.int64),
+        'feature': np.zeros(shape, dtype=np.int64),
+        'threshold': np.zeros(shape, dtype=np.float64),
+        'value': np.zeros(shape, dtype=np.float64),
+    }
+    for i, t in enumerate(trees):
+        n = t.node_count
+        arrays['left'][i, :n] = t.children_left
+        arrays['right'][i, :n] = t.children_right
+        # Leaves carry feature -2 in sklearn; any valid index works for them
+        arrays['feature'][i, :n] = np.maximum(t.feature, 0)
+        arrays['threshold'][i, :n] = t.threshold
+        arrays['value'][i, :n] = t.value[:, 0, 0]
+    arrays['params'] = np.array([
+        float(np.ravel(init.constant_)[0]),
+        float(model.learning_rate),
+        float(max(t.max_depth for t in trees))
+    ])
+    return arrays
+
+
+def publish(store_dir, model, csv_path):
+    """Build model arrays and the engineered feature/prediction table once.
+
+    Meant to run in the gunicorn master (``preload_app``) before workers fork.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+
+    model_arrays = export_model_arrays(model) if model is not None else None
+    if model_arrays is not None:
+        for name, array in model_arrays.items():
+            _save(store_dir, name, array)
+        # Tree node features index the columns the model was trained on
+        feature_names = getattr(model, 'feature_names_in_', FEATURE_COLS)
+        _save(store_dir, 'feature_names', np.array([str(c) for c in feature_names]))
+    else:
+        _clear(store_dir, MODEL_ARRAYS)
+
+    if csv_path is not None and os.path.exists(csv_path):
+        df = engineer_features(pd.read_csv(csv_path))
+        features = df[FEATURE_COLS].to_numpy(dtype=np.float64)
+        if model is not None and hasattr(model, 'predict'):
+            predictions = np.asarray(model.predict(df[FEATURE_COLS]), dtype=np.float64)
+        else:
+            predictions = np.zeros(len(df))
+        _save(store_dir, 'year', df['Year'].to_numpy(dtype=np.int64))
+        _save(store_dir, 'county', df['County'].to_numpy(dtype=str))
+        _save(store_dir, 'actual', df[TARGET_COL].to_numpy(dtype=np.float64))
+        _save(store_dir, 'features', features)
+        _save(store_dir, 'predictions', predictions)
+    else:
+        _clear(store_dir, TABLE_ARRAYS)
+
+
+def remove_store(store_dir):
+    """Delete everything ``publish`` wrote, then the directory if it is empty.
+
+    Workers that already mapped the arrays keep them until they exit.
+    """
+    _clear(store_dir, MODEL_ARRAYS + ['feature_names'] + TABLE_ARRAYS)
+    # Writable drift monitor state kept alongside the arrays (see drift_monitor.py)
+    for file_name in ['drift_state.npy', 'drift_columns.npy', 'drift.lock']:
+        path = os.path.join(store_dir, file_name)
+        if os.path.exists(path):
+            os.remove(path)
+    try:
+        os.rmdir(store_dir)
+    except OSError:
+        # Missing, or holds files we did not write (custom SHARED_STORE_DIR)
+        pass
+
+
+def attach_model(store_dir):
+    """Map the shared model arrays, or return None if none were published."""
+    if not all(os.path.exists(os.path.join(store_dir, n + '.npy')) for n in MODEL_ARRAYS):
+        return None
+    feature_names = np.load(os.path.join(store_dir, 'feature_names.npy'))
+    return SharedTreeEnsemble(_load(store_dir, MODEL_ARRAYS), list(feature_names))
+
+
+def attach_table(store_dir):
+    """Map the shared feature/prediction table, or return None."""
+    if not all(os.path.exists(os.path.join(store_dir, n + '.npy')) for n in TABLE_ARRAYS):
+        return None
+    return _load(store_dir, TABLE_ARRAYS)
@@ -0,0 +1,96 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+# Resident-memory comparison for the gunicorn deployment (Linux only, reads /proc).
+# Starts backend.app:app with 1, 4 and 8 workers in three modes, warms every worker
+# with /predict and /history, then sums RSS and PSS (proportional set size: shared
+# pages split between the processes mapping them):
+#   copy    - each worker imports the app and unpickles the model itself
+#   preload - PRELOAD_APP=1, libraries and model loaded once in the master
+#   shared  - SHARED_MEMORY=1, preload plus the memory-mapped shared store
+
+WORKER_COUNTS = [1, 4, 8]
+MODES = {
+    'copy': {'PRELOAD_APP': '0', 'SHARED_MEMORY': '0'},
+    'preload': {'PRELOAD_APP': '1', 'SHARED_MEMORY': '0'},
+    'shared': {'PRELOAD_APP': '1', 'SHARED_MEMORY': '1'}
+}
+PORT = 5077
+SAMPLE = {
+    '30-day Readmits (Proportion)': 0.0074,
+    'ICD Version(Ordinal)': 1,
+    'PCPI_log': 10.9,
+    'Total Admits people(log)': 11.2,
+    'last_year_rate': 14.8
+}
+
+
+def memory_kb(pid):
+    rss = pss = 0
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Rss:'):
+                rss = int(line.split()[1])
+            elif line.startswith('Pss:'):
+                pss = int(line.split()[1])
+    return rss, pss
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def request(path, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(f'http://127.0.0.1:{PORT}{path}', data=data,
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return resp.read()
+
+
+def measure(workers, mode):
+    env = dict(os.environ, PORT=str(PORT), WEB_CONCURRENCY=str(workers), **MODES[mode])
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'backend/gunicorn.conf.py', 'backend.app:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        # Wait until all workers are up and serving
+        deadline = time.time() + 120
+        while time.time() < deadline:
+            try:
+                if len(children(proc.pid)) == workers:
+                    request('/health')
+                    break
+            except Exception:
+                pass
+            time.sleep(0.5)
+
+        # Plenty of requests so every worker has run both handlers at least once
+        for _ in range(workers * 10):
+            request('/predict', SAMPLE)
+            request('/history')
+
+        total_rss = total_pss = 0
+        for pid in [proc.pid] + children(proc.pid):
+            rss, pss = memory_kb(pid)
+            total_rss += rss
+            total_pss += pss
+        return total_rss, total_pss
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait()
+
+
+if __name__ == '__main__':
+    print(f"{'workers':>7} | {'mode':>7} | {'RSS MiB':>8} | {'PSS MiB':>8}")
+    for workers in WORKER_COUNTS:
+        for mode in MODES:
+            rss, pss = measure(workers, mode)
+            print(f"{workers:>7} | {mode:>7} | {rss / 1024:>8.1f} | {pss / 1024:>8.1f}")
@@ -1,9 +1,11 @@
 import pandas as pd
 import numpy as np
 import pickle
+import json
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
+from backend.drift_monitor import build_reference
 
 # 1. Load Data
 print("Loading primary.csv...")
@@ -72,4 +74,10 @@ print(f"Saving model to {output_path}...")
 with open(output_path, 'wb') as f:
     pickle.dump(model, f)
 
+# 6. Save Reference Statistics for the /drift monitor
+reference_path = 'my_reference_stats.json'
+print(f"Saving reference statistics to {reference_path}...")
+with open(reference_path, 'w') as f:
+    json.dump(build_reference(df_model, feature_cols), f, indent=2)
+
 print("Done. This model is now trained on the actual primary.csv data.")
@@ -0,0 +1,153 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.shared_store import FEATURE_COLS, engineer_features
+
+# Offline bulk scoring with the production model.
+# Usage: python score.py input.csv -o scored/ [--workers 8] [--group-col County]
+#
+# The input is a raw primary.csv-style file (CSV or Parquet). Rows are split into
+# shards by group (County by default) so last_year_rate is lagged within a single
+# shard; each worker engineers features, predicts and writes its own part file.
+# Parquet input/output needs pyarrow (pip install pyarrow), which the web app does not.
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'my_best_hospital_readmission_model.pkl')
+
+model = None
+
+
+def load_model(model_path):
+    # Pool initializer: each worker unpickles the model once, not per shard
+    global model
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+
+
+def read_input(path):
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def write_output(df, path, fmt):
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def score_shard(task):
+    shard_id, df, output_dir, fmt, group_col = task
+    rows_in = len(df)
+    try:
+        # Already-engineered files are scored as-is; raw files go through training-time engineering
+        if not all(c in df.columns for c in FEATURE_COLS):
+            # log(0) / log(<0) warnings are expected here; those rows are skipped below
+            with np.errstate(divide='ignore', invalid='ignore'):
+                df = engineer_features(df, group_col=group_col)
+        rows_lagged = len(df)
+
+        # Like retrain_model.py, skip rows the model cannot take: NaN, or -inf from log(0)
+        finite = np.isfinite(df[FEATURE_COLS].to_numpy(dtype=np.float64)).all(axis=1)
+        df = df[finite].copy()
+        df['Predicted_Rate'] = model.predict(df[FEATURE_COLS]) if len(df) else []
+
+        path = os.path.join(output_dir, f'part-{shard_id:05d}.{fmt}')
+        write_output(df, path, fmt)
+    except Exception as e:
+        # Report instead of raising, so one bad shard does not abort the whole pool
+        return shard_id, rows_in, 0, 0, f"{type(e).__name__}: {e}"
+    return shard_id, rows_in, len(df), rows_lagged - len(df), None
+
+
+def split_shards(df, group_col, n_shards):
+    # Contiguous blocks of groups, so each group lands in exactly one shard
+    codes, groups = pd.factorize(df[group_col], sort=True)
+    n_shards = max(1, min(n_shards, len(groups)))
+    shard_ids = codes * n_shards // max(len(groups), 1)
+    return [part for _, part in df.groupby(shard_ids)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score a CSV/Parquet file with the readmission model.')
+    parser.add_argument('input', help='Input file (.csv or .parquet)')
+    parser.add_argument('-o', '--output-dir', required=True, help='Directory for part-XXXXX output shards (existing parts are replaced)')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='Pickled model artifact')
+    parser.add_argument('--group-col', default='County', help='Column that identifies a county/hospital series')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: all cores)')
+    parser.add_argument('--shards', type=int, default=None, help='Number of output shards (default: 4 per worker)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None, help='Output format (default: same as input)')
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if args.shards is not None and args.shards < 1:
+        parser.error('--shards must be at least 1')
+    if not os.path.exists(args.model):
+        print(f"Error: Model not found at {args.model}")
+        return 1
+    if not os.path.exists(args.input):
+        print(f"Error: Input not found at {args.input}")
+        return 1
+
+    fmt = args.format or ('parquet' if args.input.endswith('.parquet') else 'csv')
+    n_shards = args.shards or args.workers * 4
+    if fmt == 'parquet' or args.input.endswith('.parquet'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("Error: Parquet files require pyarrow (pip install pyarrow)")
+            return 1
+
+    start = time.time()
+    print(f"Loading {args.input}...")
+    df = read_input(args.input)
+    if args.group_col not in df.columns:
+        print(f"Error: Group column '{args.group_col}' not in input")
+        return 1
+
+    # Only replace the previous output once the input and arguments are known to be good
+    os.makedirs(args.output_dir, exist_ok=True)
+    # Remove parts from an earlier run so a smaller shard count leaves no stale files
+    for old_part in glob.glob(os.path.join(args.output_dir, 'part-*.csv')) + glob.glob(os.path.join(args.output_dir, 'part-*.parquet')):
+        os.remove(old_part)
+
+    shards = split_shards(df, args.group_col, n_shards)
+    tasks = [(i, part, args.output_dir, fmt, args.group_col) for i, part in enumerate(shards)]
+    print(f"Scoring {len(df)} rows in {len(tasks)} shards with {args.workers} workers...")
+
+    rows_in = rows_out = rows_invalid = 0
+    failed = []
+    with multiprocessing.Pool(args.workers, initializer=load_model, initargs=(args.model,)) as pool:
+        for done, (shard_id, n_in, n_out, n_invalid, error) in enumerate(pool.imap_unordered(score_shard, tasks), 1):
+            rows_in += n_in
+            if error:
+                failed.append(shard_id)
+                print(f"[{done}/{len(tasks)}] part-{shard_id:05d}: FAILED ({n_in} rows) - {error}")
+                continue
+            rows_out += n_out
+            rows_invalid += n_invalid
+            print(f"[{done}/{len(tasks)}] part-{shard_id:05d}: {n_out} rows scored ({rows_in}/{len(df)} read, {time.time() - start:.1f}s)")
+
+    # First-year rows have no last_year_rate; invalid rows have NaN/inf features (e.g. log of 0 admits)
+    rows_failed = sum(len(shards[i]) for i in failed)
+    rows_first_year = rows_in - rows_failed - rows_out - rows_invalid
+    print(f"Done. {rows_out} rows written to {args.output_dir} "
+          f"({rows_first_year + rows_invalid} rows skipped: {rows_first_year} first-year, {rows_invalid} non-finite features).")
+    if failed:
+        print(f"Error: {len(failed)} of {len(tasks)} shards failed ({rows_failed} rows): "
+              + ', '.join(f'part-{i:05d}' for i in sorted(failed)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())